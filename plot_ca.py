@@ -1,5 +1,6 @@
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import matplotlib
 
@@ -8,7 +9,37 @@ matplotlib.use('Agg')
 
 import matplotlib.pyplot as plt
 
-def generate_styled_plot(directory_path: str, output_filename: str) -> None:
+# Let Agg drop near-collinear vertices and chunk very long paths when
+# rasterizing the dense chronoamperometry traces.
+matplotlib.rcParams['path.simplify'] = True
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
+matplotlib.rcParams['agg.path.chunksize'] = 10000
+
+# Filename patterns, compiled once rather than per file.
+_PH_RE = re.compile(r'pH(\d+)')
+_LABEL_RE = re.compile(r'pH\d+_(.*)\.txt')
+
+def _read_ca_file(file_path):
+    """Read a CA data file, parsing only the time and charge columns.
+
+    Only parse the two columns we plot; skipping type inference and unused
+    columns keeps the C parser fast and the memory footprint small. Headers
+    are sniffed with a zero-row read first, so a file missing a required
+    column is rejected without paying for a full parse. Returns the
+    exception on failure so the caller can report it per file.
+    """
+    cols = ['Time (s)', 'WE(1).Charge (C)']
+    try:
+        header = pd.read_csv(file_path, sep='\t', nrows=0)
+        if not all(c in header.columns for c in cols):
+            # The caller's column check reports the missing column.
+            return header
+        return pd.read_csv(file_path, sep='\t', usecols=cols,
+                           dtype={c: 'float64' for c in cols}, engine='c')
+    except Exception as e:
+        return e
+
+def generate_styled_plot(directory_path: str, output_filename: str, ax=None):
     """
     Scans a directory for all .txt data files, normalises the start time, and plots
     all data on a single graph with unique markers and line styles for each system.
@@ -20,89 +51,124 @@ def generate_styled_plot(directory_path: str, output_filename: str) -> None:
         The path to the directory containing the .txt data files.
     output_filename : str
         The name of the file to save the plot to.
+    ax : matplotlib.axes.Axes, optional
+        An existing axis to draw on. Passing one lets repeated runs (e.g. a
+        watch-mode regeneration loop) reuse the same figure and Agg canvas
+        instead of rebuilding them; the axis is cleared first.
 
     Returns
     -------
-    None
-        Saves a matplotlib plot to the specified file.
+    dict or None
+        A mapping of filename to the plotted Line2D handle, so callers that
+        rerun on fresh data can update curves in place via line.set_data()
+        followed by ax.relim()/ax.autoscale_view(). None if the directory
+        could not be read.
     """
-    # --- 1. Create a single plot and define styles ---
-    fig, ax = plt.subplots(figsize=(12, 8))
+    # --- 1. Create (or reuse) a single plot and define styles ---
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(12, 8))
+    else:
+        fig = ax.figure
+        ax.cla()
 
     # Define lists of styles to cycle through for better readability.
     markers = ['o', 's', '^', 'D', 'v', 'p', '*', '<', '>', 'X']
     linestyles = ['-', '--', '-.', ':']
 
+    # A single scandir pass; DirEntry caches the stat needed by is_file().
     try:
-        all_files = sorted([f for f in os.listdir(directory_path) if f.endswith(".txt")])
+        all_files = sorted(e.name for e in os.scandir(directory_path)
+                           if e.is_file() and e.name.endswith(".txt"))
     except FileNotFoundError:
         print(f"Error: The directory '{directory_path}' could not be found.")
-        return
-
-    plot_index = 0 # Initialise a counter for cycling through styles.
+        return None
 
-    # --- 2. Loop through all files, process, and plot ---
+    # --- 2. Resolve plot labels first, so only recognised files get parsed ---
+    labelled_files = []
     for filename in all_files:
         plot_label = None
 
         if "pH" in filename:
-            match_ph = re.search(r'pH(\d+)', filename)
-            match_label = re.search(r'pH\d+_(.*)\.txt', filename)
+            match_ph = _PH_RE.search(filename)
+            match_label = _LABEL_RE.search(filename)
             if match_ph and match_label:
                 ph = match_ph.group(1)
                 base_label = match_label.group(1).strip()
                 plot_label = f"{base_label} (pH {ph})"
         elif "Cu" in filename:
             plot_label = "Cu"
-        
+
         if not plot_label:
             print(f"ℹ️  Skipping unrecognised file: {filename}")
             continue
 
-        file_path = os.path.join(directory_path, filename)
-        try:
-            data = pd.read_csv(file_path, sep='\t')
-            
-            time_col_s = 'Time (s)'
-            charge_col = 'WE(1).Charge (C)'
-
-            if time_col_s in data.columns and charge_col in data.columns:
-                # Normalise time to start at 0.
-                initial_time = data[time_col_s].iloc[0]
-                data[time_col_s] = data[time_col_s] - initial_time
-
-                # Convert time to minutes.
-                data['Time (min)'] = data[time_col_s] / 60
-                
-                # --- Select unique styles for the current plot ---
-                marker = markers[plot_index % len(markers)]
-                linestyle = linestyles[plot_index % len(linestyles)]
-
-                # Plot with specified styles. `markevery` prevents the plot from being too crowded.
-                ax.plot(data['Time (min)'], data[charge_col], label=plot_label,
-                        marker=marker, linestyle=linestyle, markevery=150, markersize=7)
-                
-                plot_index += 1 # Increment index for the next file's style.
-            else:
-                print(f"⚠️  Warning: Could not find required columns in '{filename}'.")
-
-        except Exception as e:
-            print(f"❌ An error occurred while processing '{filename}': {e}")
-
-    # --- 3. Configure the final plot ---
+        labelled_files.append((filename, plot_label))
+
+    # --- 3. Parse all files concurrently, then plot serially ---
+    # pandas' C parser releases the GIL, so threads overlap I/O and parsing.
+    # matplotlib is not thread-safe, so all plotting stays on the main thread.
+    paths = [os.path.join(directory_path, f) for f, _ in labelled_files]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        frames = list(executor.map(_read_ca_file, paths))
+
+    plot_index = 0 # Initialise a counter for cycling through styles.
+    lines = {}     # Line2D handles keyed by filename, for incremental reruns.
+
+    for (filename, plot_label), data in zip(labelled_files, frames):
+        if isinstance(data, Exception):
+            print(f"❌ An error occurred while processing '{filename}': {data}")
+            continue
+
+        time_col_s = 'Time (s)'
+        charge_col = 'WE(1).Charge (C)'
+
+        if time_col_s in data.columns and charge_col in data.columns:
+            # Work on plain NumPy arrays: normalise time to start at 0 and
+            # convert to minutes in a single vectorized pass.
+            t = data[time_col_s].to_numpy(copy=False)
+            q = data[charge_col].to_numpy(copy=False)
+            t_min = (t - t[0]) * (1.0 / 60.0)
+
+            # Down-sample very dense traces before plotting: ~4000 points
+            # is visually indistinguishable at 600 DPI, but matplotlib no
+            # longer has to draw every segment.
+            step = max(1, len(t_min) // 4000)
+            t_min = t_min[::step]
+            q = q[::step]
+
+            # --- Select unique styles for the current plot ---
+            marker = markers[plot_index % len(markers)]
+            linestyle = linestyles[plot_index % len(linestyles)]
+
+            # Plot with specified styles. `markevery` prevents the plot from being too crowded.
+            # Rasterize the data curve itself; axes, text, and legend stay vector.
+            line, = ax.plot(t_min, q, label=plot_label,
+                            marker=marker, linestyle=linestyle, markevery=150, markersize=7,
+                            rasterized=True)
+            lines[filename] = line
+
+            plot_index += 1 # Increment index for the next file's style.
+        else:
+            print(f"⚠️  Warning: Could not find required columns in '{filename}'.")
+
+    # --- 4. Configure the final plot ---
     ax.set_title('Combined Chronoamperometry Analysis (Time Normalised)')
     ax.set_xlabel('Time (min)')
     ax.set_ylabel('Charge ($C$)')
     ax.legend(title='System', fontsize='small', ncol=2) # Using 2 columns for the legend.
     ax.grid(True, linestyle='--', alpha=0.7)
 
-    # --- 4. Save the figure ---
+    # --- 5. Save the figure ---
     try:
-        fig.savefig(output_filename, dpi=600, bbox_inches='tight')
+        # Lossless LZW keeps the 600 dpi TIFF small and cheap to write.
+        fig.savefig(output_filename, dpi=600, bbox_inches='tight',
+                    pil_kwargs={'compression': 'tiff_lzw'})
         print(f"✅ Plot successfully saved as '{output_filename}'")
     except Exception as e:
         print(f"❌ Error saving file: {e}")
 
+    return lines
+
 # --- Main execution block ---
 if __name__ == '__main__':
     data_directory = 'CAs/'
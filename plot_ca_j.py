@@ -1,14 +1,43 @@
 import os
 import re
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# Let Agg drop near-collinear vertices and chunk very long paths when
+# rasterizing the dense chronoamperometry traces.
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
+plt.rcParams['agg.path.chunksize'] = 10000
+
 # --- IMPORTANT: Please set your electrode's surface area here ---
 # The surface area of the working electrode in square centimetres (cm^2).
 # This value is essential for calculating the current density correctly.
 ELECTRODE_AREA_CM2 = 1.0
 
+# Filename patterns, compiled once rather than per file.
+_PH_RE = re.compile(r'pH(\d+)')
+_LABEL_RE = re.compile(r'pH\d+_(.*)\.txt')
+
+def _read_ca_file(file_path):
+    """Read a CA data file, parsing only the time and current columns.
+
+    Headers are sniffed with a zero-row read first, so a file missing a
+    required column is rejected without paying for a full parse; the caller's
+    column check then reports it. Returns the exception on failure so the
+    caller can report it per file.
+    """
+    cols = ['Time (s)', 'WE(1).Current (A)']
+    try:
+        header = pd.read_csv(file_path, sep='\t', nrows=0)
+        if not all(c in header.columns for c in cols):
+            return header
+        return pd.read_csv(file_path, sep='\t', usecols=cols,
+                           dtype={c: 'float64' for c in cols}, engine='c')
+    except Exception as e:
+        return e
+
 def generate_ca_subplots(directory_path: str, output_filename: str) -> None:
     """
     Scans a directory for chronoamperometry data, groups it by pH, and plots
@@ -30,8 +59,10 @@ def generate_ca_subplots(directory_path: str, output_filename: str) -> None:
     # --- 1. Group files by pH value ---
     grouped_files = defaultdict(list)
     cu_ref_path = None
+    # A single scandir pass; DirEntry caches the stat needed by is_file().
     try:
-        all_files = sorted([f for f in os.listdir(directory_path) if f.endswith(".txt")])
+        all_files = sorted(e.name for e in os.scandir(directory_path)
+                           if e.is_file() and e.name.endswith(".txt"))
     except FileNotFoundError:
         print(f"Error: The directory '{directory_path}' could not be found.")
         return
@@ -40,12 +71,21 @@ def generate_ca_subplots(directory_path: str, output_filename: str) -> None:
         if "Cu" in filename:
             cu_ref_path = os.path.join(directory_path, filename)
         elif "pH" in filename:
-            match_ph = re.search(r'pH(\d+)', filename)
+            match_ph = _PH_RE.search(filename)
             if match_ph:
                 ph_key = f"pH {match_ph.group(1)}"
                 grouped_files[ph_key].append(os.path.join(directory_path, filename))
 
-    # --- 2. Create subplots and define styles ---
+    # --- 2. Parse every file concurrently before plotting ---
+    # pandas' C parser releases the GIL, so threads overlap I/O and parsing.
+    # matplotlib is not thread-safe, so plotting stays on the main thread.
+    all_paths = [p for paths in grouped_files.values() for p in paths]
+    if cu_ref_path:
+        all_paths.append(cu_ref_path)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        frames = dict(zip(all_paths, executor.map(_read_ca_file, all_paths)))
+
+    # --- 3. Create subplots and define styles ---
     ph_keys = sorted(grouped_files.keys())
     fig, axes = plt.subplots(len(ph_keys), 1, figsize=(10, 15), sharex=True)
     fig.suptitle('Chronoamperometry Analysis: Current Density vs. Time', fontsize=16)
@@ -53,59 +93,76 @@ def generate_ca_subplots(directory_path: str, output_filename: str) -> None:
     markers = ['o', 's', '^', 'D', 'v']
     linestyles = ['-', '--', '-.', ':']
 
-    # --- 3. Loop through each pH group and plot ---
+    # --- 4. Derive the Copper reference arrays once, reused on every subplot ---
+    ref_t_min, ref_j = None, None
+    if cu_ref_path:
+        data_ref = frames[cu_ref_path]
+        if isinstance(data_ref, Exception):
+            print(f"❌ Could not process reference file '{cu_ref_path}': {data_ref}")
+        elif 'Time (s)' in data_ref.columns and 'WE(1).Current (A)' in data_ref.columns:
+            # Normalise time and compute current density on NumPy arrays.
+            t_ref = data_ref['Time (s)'].to_numpy(copy=False)
+            ref_t_min = (t_ref - t_ref[0]) * (1.0 / 60.0)
+            ref_j = data_ref['WE(1).Current (A)'].to_numpy(copy=False) * (1000.0 / ELECTRODE_AREA_CM2)
+            # Down-sample dense traces; ~4000 points look identical at 600 DPI.
+            step = max(1, len(ref_t_min) // 4000)
+            ref_t_min = ref_t_min[::step]
+            ref_j = ref_j[::step]
+
+    # --- 5. Loop through each pH group and plot ---
     for i, ph_key in enumerate(ph_keys):
         ax = axes[i]
         plot_index = 0
 
         # First, plot the Copper reference on the current subplot
-        if cu_ref_path:
-            try:
-                data_ref = pd.read_csv(cu_ref_path, sep='\t')
-                if 'Time (s)' in data_ref.columns and 'WE(1).Current (A)' in data_ref.columns:
-                    data_ref['Time (min)'] = (data_ref['Time (s)'] - data_ref['Time (s)'].iloc[0]) / 60
-                    data_ref['j (mA/cm2)'] = (data_ref['WE(1).Current (A)'] * 1000) / ELECTRODE_AREA_CM2
-                    ax.plot(data_ref['Time (min)'], data_ref['j (mA/cm2)'],
-                            label='Cu Reference', color='grey', linestyle='--')
-            except Exception as e:
-                print(f"❌ Could not process reference file '{cu_ref_path}': {e}")
+        if ref_t_min is not None:
+            ax.plot(ref_t_min, ref_j,
+                    label='Cu Reference', color='grey', linestyle='--',
+                    rasterized=True)
 
         # Now, plot all systems for the current pH
         for file_path in grouped_files[ph_key]:
             filename = os.path.basename(file_path)
-            match_label = re.search(r'pH\d+_(.*)\.txt', filename)
+            match_label = _LABEL_RE.search(filename)
             plot_label = match_label.group(1).strip() if match_label else filename
 
-            try:
-                data = pd.read_csv(file_path, sep='\t')
-                if 'Time (s)' in data.columns and 'WE(1).Current (A)' in data.columns:
-                    # Normalise time and calculate current density
-                    data['Time (min)'] = (data['Time (s)'] - data['Time (s)'].iloc[0]) / 60
-                    data['j (mA/cm2)'] = (data['WE(1).Current (A)'] * 1000) / ELECTRODE_AREA_CM2
-
-                    # Select styles and plot
-                    marker = markers[plot_index % len(markers)]
-                    linestyle = linestyles[plot_index % len(linestyles)]
-                    ax.plot(data['Time (min)'], data['j (mA/cm2)'], label=plot_label,
-                            marker=marker, linestyle=linestyle, markevery=200, markersize=6)
-                    plot_index += 1
-                else:
-                    print(f"⚠️  Warning: Could not find required columns in '{filename}'.")
-            except Exception as e:
-                print(f"❌ An error occurred while processing '{filename}': {e}")
-
-        # --- 4. Configure each subplot ---
+            data = frames[file_path]
+            if isinstance(data, Exception):
+                print(f"❌ An error occurred while processing '{filename}': {data}")
+            elif 'Time (s)' in data.columns and 'WE(1).Current (A)' in data.columns:
+                # Normalise time and calculate current density on NumPy arrays
+                t = data['Time (s)'].to_numpy(copy=False)
+                t_min = (t - t[0]) * (1.0 / 60.0)
+                j = data['WE(1).Current (A)'].to_numpy(copy=False) * (1000.0 / ELECTRODE_AREA_CM2)
+                # Down-sample dense traces; ~4000 points look identical at 600 DPI.
+                step = max(1, len(t_min) // 4000)
+                t_min = t_min[::step]
+                j = j[::step]
+
+                # Select styles and plot
+                marker = markers[plot_index % len(markers)]
+                linestyle = linestyles[plot_index % len(linestyles)]
+                ax.plot(t_min, j, label=plot_label,
+                        marker=marker, linestyle=linestyle, markevery=200, markersize=6,
+                        rasterized=True)
+                plot_index += 1
+            else:
+                print(f"⚠️  Warning: Could not find required columns in '{filename}'.")
+
+        # --- 6. Configure each subplot ---
         ax.set_title(f'Analysis for {ph_key}')
         ax.set_ylabel('j / mA$\\cdot$cm$^{-2}$')
         ax.legend(title='System')
         ax.grid(True, linestyle='--', alpha=0.7)
 
-    # --- 5. Final adjustments and save ---
+    # --- 7. Final adjustments and save ---
     axes[-1].set_xlabel('Time (min)') # Add x-label only to the bottom plot
     plt.tight_layout(rect=[0, 0.03, 1, 0.95]) # Adjust layout to make room for suptitle
 
     try:
-        fig.savefig(output_filename, dpi=600, bbox_inches='tight')
+        # Lossless LZW keeps the 600 dpi TIFF small and cheap to write.
+        fig.savefig(output_filename, dpi=600, bbox_inches='tight',
+                    pil_kwargs={'compression': 'tiff_lzw'})
         print(f"✅ Plot successfully saved as '{output_filename}'")
     except Exception as e:
         print(f"❌ Error saving file: {e}")
@@ -1,11 +1,21 @@
 import os
 import re
-import glob
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 import numpy as np
 
+# Filename patterns, compiled once at import time rather than per call.
+_EIS_PATTERN = re.compile(
+    r"(\d+)_"                               # 1: Index number
+    r"(.+?)\s"                              # 2: Chemical name (non-greedy)
+    r"(?:(pH\s\d+)\s)?"                     # 3: Optional pH group
+    r"(OCP|CAP|FAR)"                        # 4: Condition (OCP, CAP, or FAR)
+    r"\s\((Nyquist|Bode|Nyquist and Bode)\)" # 5: Plot type
+)
+_COND_RE = re.compile(r"(OCP|CAP|FAR)")
+
 def parse_filename(filepath):
     """
     Parses a filepath to extract the chemical, pH, condition, and a unique ID.
@@ -17,30 +27,13 @@ def parse_filename(filepath):
     :return: A dictionary containing the parsed information, or None if parsing fails.
     """
     filename = os.path.basename(filepath)
-    
-    # Use regular expressions to robustly capture the different parts of the filename.
-    pattern = re.compile(
-        r"(\d+)_"                               # 1: Index number
-        r"(.+?)\s"                              # 2: Chemical name (non-greedy)
-        r"(?:(pH\s\d+)\s)?"                     # 3: Optional pH group
-        r"(OCP|CAP|FAR)"                        # 4: Condition (OCP, CAP, or FAR)
-        r"\s\((Nyquist|Bode|Nyquist and Bode)\)" # 5: Plot type
-    )
-    
-    match = pattern.match(filename)
-    
-    if match:
-        parts = match.groups()
-        return {
-            "id": f"{parts[0]}_{parts[1]} {parts[2]} {parts[3]}", # A unique ID for the experiment
-            "chemical": parts[1].strip(),
-            "ph": parts[2] if parts[2] else 'N/A',
-            "condition": parts[3]
-        }
-        
-    # Handle special cases like the Copper reference files which have a different format.
-    if 'Cu' in filename:
-        condition_match = re.search(r"(OCP|CAP|FAR)", filename)
+
+    # Handle the special-format files with cheap substring checks before
+    # falling back to the backtracking-heavy main pattern. The 'pH' guard
+    # keeps regular pH-series experiments on the full parse below.
+    if 'Cu' in filename and 'pH' not in filename:
+        # Copper reference files have a different format.
+        condition_match = _COND_RE.search(filename)
         if condition_match:
             return {
                 "id": f"Cu_{condition_match.group(1)}",
@@ -48,10 +41,9 @@ def parse_filename(filepath):
                 "ph": 'N/A', # No pH for Cu reference
                 "condition": condition_match.group(1)
             }
-            
-    # Handle the 'KReO4 + Na2SO4' case
-    if 'KReO4 + Na2SO4' in filename:
-        condition_match = re.search(r"(OCP|CAP|FAR)", filename)
+
+    elif 'KReO4 + Na2SO4' in filename and 'pH' not in filename:
+        condition_match = _COND_RE.search(filename)
         if condition_match:
             return {
                 "id": f"KReO4 + Na2SO4_{condition_match.group(1)}",
@@ -59,7 +51,19 @@ def parse_filename(filepath):
                 "ph": 'N/A',
                 "condition": condition_match.group(1)
             }
-            
+
+    # Use the module-level pattern to robustly capture the parts of the filename.
+    match = _EIS_PATTERN.match(filename)
+
+    if match:
+        parts = match.groups()
+        return {
+            "id": f"{parts[0]}_{parts[1]} {parts[2]} {parts[3]}", # A unique ID for the experiment
+            "chemical": parts[1].strip(),
+            "ph": parts[2] if parts[2] else 'N/A',
+            "condition": parts[3]
+        }
+
     return None
 
 def group_files_by_experiment(data_dir):
@@ -67,55 +71,101 @@ def group_files_by_experiment(data_dir):
     Scans the data directory, groups files by experiment, handling split files.
 
     :param data_dir: The directory containing EIS files.
-    :return: A dictionary grouping file lists by [ph][condition][chemical].
+    :return: A pandas Series of file lists indexed by (ph, condition, chemical).
     """
-    experiment_files = defaultdict(list)
-    
-    for filepath in glob.glob(os.path.join(data_dir, '*.txt')):
+    # Keep the parsed info next to the file list so each filename is only
+    # parsed once.
+    experiment_files = {}
+
+    # One scandir pass instead of a glob; DirEntry.path avoids re-joining.
+    for entry in os.scandir(data_dir):
+        if not (entry.is_file() and entry.name.endswith('.txt')):
+            continue
+        filepath = entry.path
         parsed_info = parse_filename(filepath)
         if parsed_info:
-            experiment_files[parsed_info['id']].append(filepath)
+            experiment_files.setdefault(parsed_info['id'], (parsed_info, []))[1].append(filepath)
 
-    grouped_plots = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-    
-    for file_list in experiment_files.values():
-        parsed_info = parse_filename(file_list[0])
-        if parsed_info:
-            ph = parsed_info['ph']
-            condition = parsed_info['condition']
-            chemical = parsed_info['chemical']
-            grouped_plots[ph][condition][chemical].extend(file_list)
-            
-    return grouped_plots
+    # Flatten the parse results into one row per file. The labels are stored
+    # as Categoricals: the category sets are tiny and fixed, so grouping
+    # hashes integer codes instead of Python strings and memory stays flat
+    # even for large directories.
+    paths, phs, conditions, chemicals = [], [], [], []
+    for parsed_info, file_list in experiment_files.values():
+        for filepath in file_list:
+            paths.append(filepath)
+            phs.append(parsed_info['ph'])
+            conditions.append(parsed_info['condition'])
+            chemicals.append(parsed_info['chemical'])
+
+    df = pd.DataFrame({
+        'path': paths,
+        'ph': pd.Categorical(phs),
+        'condition': pd.Categorical(conditions, categories=['OCP', 'CAP', 'FAR']),
+        'chemical': pd.Categorical(chemicals),
+    })
+
+    # The (ph, condition, chemical) -> [files] mapping is a groupby by
+    # construction; return the aggregated Series instead of rebuilding it as
+    # hand-rolled nested dicts. The index is lexsorted so partial .loc
+    # lookups on (ph, condition) do not fall off the fast path.
+    return df.groupby(['ph', 'condition', 'chemical'],
+                      observed=True, sort=False)['path'].agg(list).sort_index()
+
+# The only columns the plots ever touch; everything else in the EIS export
+# can be skipped by the parser.
+_EIS_COLUMNS = frozenset({"Z' (Ω)", "-Z'' (Ω)", 'Frequency (Hz)', 'Z (Ω)', '-Phase (°)'})
+
+def _read_eis_file(filepath):
+    """Read an EIS file, parsing only the columns used for plotting.
+
+    Prefers pandas' multithreaded PyArrow engine. That engine needs an
+    explicit column list, so headers are sniffed first with a zero-row read
+    (which also tolerates split files carrying only Nyquist or only Bode
+    columns). Falls back to the C engine with a callable `usecols` when
+    PyArrow is not available.
+    """
+    try:
+        header = pd.read_csv(filepath, sep=';', nrows=0)
+        cols = [c for c in header.columns if c in _EIS_COLUMNS]
+        return pd.read_csv(filepath, sep=';', usecols=cols,
+                           engine='pyarrow', dtype_backend='pyarrow')
+    except (ImportError, ValueError):
+        return pd.read_csv(filepath, sep=';', usecols=lambda c: c in _EIS_COLUMNS)
+
+# Mapping from exported column headers to the short keys used when plotting.
+_EIS_COLUMN_KEYS = {
+    "Z' (Ω)": 'zre',
+    "-Z'' (Ω)": 'zim',
+    'Frequency (Hz)': 'freq',
+    'Z (Ω)': 'zmag',
+    '-Phase (°)': 'phase',
+}
 
 def load_eis_data(file_list):
     """
-    Loads EIS data from one or two files (for split Nyquist/Bode).
-    If two files are provided, it merges them into a single DataFrame.
+    Loads EIS data from one or two files (for split Nyquist/Bode) into plain
+    NumPy arrays keyed by quantity.
+
+    Split experiments are sampled on the same frequency sweep, so the files
+    are combined by straight column extraction — each quantity is taken from
+    the first file that provides it, with no merge needed.
 
     :param file_list: A list containing one or two filepaths for an experiment.
-    :return: A single pandas DataFrame with all data, or None on error.
+    :return: A dict mapping 'zre'/'zim'/'freq'/'zmag'/'phase' to NumPy arrays
+             (missing quantities are omitted), or None on error.
     """
     try:
-        if len(file_list) == 1:
-            return pd.read_csv(file_list[0], sep=';')
-        elif len(file_list) == 2:
-            df1 = pd.read_csv(file_list[0], sep=';')
-            df2 = pd.read_csv(file_list[1], sep=';')
-            # A simple way to merge is to combine the dataframes, assuming columns are unique
-            # or one is a subset of the other.
-            # A more complex merge would be needed if columns overlap with different data.
-            # For now, let's assume one file has Nyquist and the other has Bode.
-            if "Z' (Ω)" not in df2.columns: # df2 is likely Bode only
-                merged_df = pd.merge(df1, df2, on="Frequency (Hz)", how="outer", suffixes=('', '_y'))
-            else: # df1 is likely Bode only
-                merged_df = pd.merge(df2, df1, on="Frequency (Hz)", how="outer", suffixes=('', '_y'))
-
-            return merged_df.loc[:, ~merged_df.columns.str.endswith('_y')]
+        data = {}
+        for filepath in file_list[:2]:
+            df = _read_eis_file(filepath)
+            for column, key in _EIS_COLUMN_KEYS.items():
+                if key not in data and column in df.columns:
+                    data[key] = df[column].to_numpy()
+        return data or None
     except Exception as e:
         print(f"Error loading data from {file_list}: {e}")
         return None
-    return None
 
 def plot_eis_data():
     """
@@ -128,11 +178,28 @@ def plot_eis_data():
     unique_chemicals = sorted(['K2ReCl6', 'KReO4', 'NH4ReO4', 'Cu', 'KReO4 + Na2SO4'])
     colors = plt.cm.viridis(np.linspace(0, 1, len(unique_chemicals)))
     markers = ['o', 's', '^', 'D', 'v', 'p', '*', 'X']
-    STYLE_MAP = {chem: {'color': colors[i], 'marker': markers[i % len(markers)], 'markersize': 5, 'linestyle': 'None'} for i, chem in enumerate(unique_chemicals)}
-    DEFAULT_STYLE = {'color': 'grey', 'marker': 'x'}
-    
+    STYLE_MAP = {chem: dict(color=colors[i], marker=markers[i % len(markers)], markersize=5, linestyle='None') for i, chem in enumerate(unique_chemicals)}
+    DEFAULT_STYLE = dict(color='grey', marker='x')
+
     grouped_data = group_files_by_experiment(DATA_DIR)
-    
+
+    # Resolve each chemical's style once up front instead of a STYLE_MAP.get
+    # in every subplot cell; all three figures share the resolved dicts.
+    all_chemicals = set(grouped_data.index.get_level_values('chemical'))
+    resolved_styles = {chemical: STYLE_MAP.get(chemical, DEFAULT_STYLE)
+                       for chemical in all_chemicals}
+
+    # Load every experiment's files concurrently up front; pandas' C parser
+    # releases the GIL while reading, and matplotlib (not thread-safe) only
+    # runs on the main thread below.
+    all_file_lists = [file_list
+                      for (ph, condition, _), file_list in grouped_data.items()
+                      if ph in ROWS and condition in COLS]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        loaded_data = dict(zip(map(tuple, all_file_lists),
+                               executor.map(load_eis_data, all_file_lists)))
+
+
     fig_nyquist, axes_nyquist = plt.subplots(3, 3, figsize=(15, 15))
     fig_bode1, axes_bode1 = plt.subplots(3, 3, figsize=(15, 15), sharex=True)
     fig_bode2, axes_bode2 = plt.subplots(3, 3, figsize=(15, 15), sharex=True, sharey=True)
@@ -150,23 +217,32 @@ def plot_eis_data():
             ax_b1.set_title(title)
             ax_b2.set_title(title)
             
-            experiments_to_plot = grouped_data[ph][condition]
-            
+            try:
+                experiments_to_plot = grouped_data.loc[(ph, condition)]
+            except KeyError:
+                experiments_to_plot = pd.Series(dtype=object)
+
             for chemical, file_list in sorted(experiments_to_plot.items()):
-                df = load_eis_data(file_list)
-                if df is not None:
-                    style = STYLE_MAP.get(chemical, DEFAULT_STYLE)
-                    
-                    ax_n.plot(df["Z' (Ω)"], df["-Z'' (Ω)"], label=chemical, **style)
-                    ax_b1.plot(df['Frequency (Hz)'], df['Z (Ω)'], label=chemical, **style)
-                    ax_b2.plot(df['Frequency (Hz)'], df['-Phase (°)'], label=chemical, **style)
+                data = loaded_data[tuple(file_list)]
+                if data is not None:
+                    style = resolved_styles[chemical]
+
+                    # Pull each array out once per cell; a split or truncated
+                    # export may lack some quantities, so guard before plotting.
+                    z_re, z_im = data.get('zre'), data.get('zim')
+                    freq, zmag, phase = data.get('freq'), data.get('zmag'), data.get('phase')
+                    if z_re is not None and z_im is not None:
+                        ax_n.plot(z_re, z_im, label=chemical, rasterized=True, **style)
+                    if freq is not None and zmag is not None:
+                        ax_b1.plot(freq, zmag, label=chemical, rasterized=True, **style)
+                    if freq is not None and phase is not None:
+                        ax_b2.plot(freq, phase, label=chemical, rasterized=True, **style)
 
             # --- Formatting for each subplot ---
             # Nyquist
             ax_n.set_xlabel("Z' / Ω")
             ax_n.set_ylabel("-Z'' / Ω")
             ax_n.grid(True, linestyle=':')
-            ax_n.legend()
             ax_n.set_aspect('equal', adjustable='box')
             # UPDATED: Set fixed axis limits for all Nyquist plots
             ax_n.set_xlim(0, 200)
@@ -176,25 +252,37 @@ def plot_eis_data():
             ax_b1.set_xscale('log')
             ax_b1.set_ylabel("|Z| / Ω")
             ax_b1.grid(True, which='both', linestyle=':')
-            ax_b1.legend()
-            
+
             # Bode 2
             ax_b2.set_xscale('log')
             ax_b2.set_ylabel("-Phase / °")
             ax_b2.grid(True, which='both', linestyle=':')
-            ax_b2.legend()
-    
+
     for j in range(3):
         axes_bode1[2, j].set_xlabel("Frequency / Hz")
         axes_bode2[2, j].set_xlabel("Frequency / Hz")
 
-    fig_nyquist.tight_layout(rect=[0, 0.03, 1, 0.95])
-    fig_bode1.tight_layout(rect=[0, 0.03, 1, 0.95])
-    fig_bode2.tight_layout(rect=[0, 0.03, 1, 0.95])
+    # One figure-level legend built from proxy artists instead of 9 per-axes
+    # legends per figure. Only list chemicals that actually land on a subplot:
+    # entries with ph='N/A' (e.g. the Cu reference) fall outside the pH grid.
+    plotted_chemicals = sorted({chemical
+                                for (ph, condition, chemical) in grouped_data.index
+                                if ph in ROWS and condition in COLS})
+    proxy_handles = [Line2D([], [], label=chem, **resolved_styles[chem])
+                     for chem in plotted_chemicals]
+    if proxy_handles:
+        for fig in (fig_nyquist, fig_bode1, fig_bode2):
+            fig.legend(handles=proxy_handles, loc='upper right', ncol=len(plotted_chemicals))
+
+    fig_nyquist.tight_layout(rect=[0, 0.03, 1, 0.92])
+    fig_bode1.tight_layout(rect=[0, 0.03, 1, 0.92])
+    fig_bode2.tight_layout(rect=[0, 0.03, 1, 0.92])
     
-    fig_nyquist.savefig('eis_nyquist_plots.tiff', dpi=600)
-    fig_bode1.savefig('eis_bode1_plots.tiff', dpi=600)
-    fig_bode2.savefig('eis_bode2_plots.tiff', dpi=600)
+    # Lossless LZW keeps the 600 dpi TIFFs small and cheap to write.
+    pil_kwargs = {'compression': 'tiff_lzw'}
+    fig_nyquist.savefig('eis_nyquist_plots.tiff', dpi=600, pil_kwargs=pil_kwargs)
+    fig_bode1.savefig('eis_bode1_plots.tiff', dpi=600, pil_kwargs=pil_kwargs)
+    fig_bode2.savefig('eis_bode2_plots.tiff', dpi=600, pil_kwargs=pil_kwargs)
     
     print("EIS plots generated successfully.")
 
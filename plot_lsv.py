@@ -1,5 +1,6 @@
 import os
-import glob
+import re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -7,6 +8,19 @@ import matplotlib.pyplot as plt
 # The surface area of the working electrode in square centimeters (cm^2).
 ELECTRODE_AREA_CM2 = 1.0
 
+def _read_lsv_file(file_path):
+    """Read an LSV data file, parsing only the potential and current columns.
+
+    Headers are sniffed with a zero-row read first, so a file missing a
+    required column is rejected without paying for a full parse.
+    """
+    cols = ['Potential applied (V)', 'WE(1).Current (A)']
+    header = pd.read_csv(file_path, delimiter='\t', header=0, nrows=0)
+    if not all(c in header.columns for c in cols):
+        return header
+    return pd.read_csv(file_path, delimiter='\t', header=0, usecols=cols,
+                       dtype={c: 'float64' for c in cols}, engine='c')
+
 def plot_lsv_data():
     """
     This script loads Linear Sweep Voltammetry (LSV) data from a specified
@@ -31,26 +45,52 @@ def plot_lsv_data():
     fig, axes = plt.subplots(1, 3, figsize=(18, 6), sharey=True)
     cu_ref_path = os.path.join(data_directory, 'LSV_Reference Cu')
 
+    # --- Concurrent File Loading ---
+    # Scan the directory once instead of globbing per chemical, then filter
+    # the cached entries with a compiled pattern for each chemical. The
+    # pattern mirrors the glob 'LSV_pH*_{chemical}*': pH is written with a
+    # space in these filenames (e.g. 'LSV_pH 1_KReO4.txt'), so anything may
+    # sit between 'pH' and the '_{chemical}' part.
+    entries = sorted(e.name for e in os.scandir(data_directory)
+                     if e.is_file() and e.name.startswith('LSV_pH'))
+    chemical_files = {}
+    for chemical in chemicals:
+        pattern = re.compile(rf'LSV_pH.*_{re.escape(chemical)}')
+        chemical_files[chemical] = [os.path.join(data_directory, name)
+                                    for name in entries if pattern.match(name)]
+
+    # Parse all collected files concurrently; pandas' C parser releases the
+    # GIL, so threads overlap I/O and parsing while matplotlib (not
+    # thread-safe) stays on the main thread.
+    all_paths = [p for paths in chemical_files.values() for p in paths]
+    if os.path.exists(cu_ref_path):
+        all_paths.append(cu_ref_path)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        frames = dict(zip(all_paths, executor.map(_read_lsv_file, all_paths)))
+
+    # --- Copper Reference ---
+    # Derive the reference arrays once; they are identical on all three axes.
+    v_ref, j_ref = None, None
+    if cu_ref_path in frames:
+        df_ref = frames[cu_ref_path]
+        v_ref = df_ref['Potential applied (V)'].to_numpy()
+        j_ref = df_ref['WE(1).Current (A)'].to_numpy() * (1000.0 / ELECTRODE_AREA_CM2)
+
     # --- Main Plotting Loop ---
     for ax, chemical in zip(axes, chemicals):
         # Plot the Copper reference
-        if os.path.exists(cu_ref_path):
-            df_ref = pd.read_csv(cu_ref_path, delimiter='\t', header=0)
-            current_density_ref = (df_ref['WE(1).Current (A)'] * 1000) / ELECTRODE_AREA_CM2
+        if v_ref is not None:
             ax.plot(
-                df_ref['Potential applied (V)'],
-                current_density_ref,
+                v_ref,
+                j_ref,
                 label='Reference Cu',
                 linestyle='--',
-                color='gray'
+                color='gray',
+                rasterized=True
             )
 
-        # Find and plot the data for the current chemical
-        search_pattern = os.path.join(data_directory, f'LSV_pH*_{chemical}*')
-        file_paths = sorted(glob.glob(search_pattern))
-
-        # Plot each pH file with its defined style
-        for file_path in file_paths:
+        # Plot each pH file for the current chemical with its defined style
+        for file_path in chemical_files[chemical]:
             filename = os.path.basename(file_path)
             try:
                 ph_value = filename.split('_')[1]
@@ -60,7 +100,7 @@ def plot_lsv_data():
             # Get the style from the map based on the pH value
             style = style_map.get(ph_value, default_style)
 
-            df_chem = pd.read_csv(file_path, delimiter='\t', header=0)
+            df_chem = frames[file_path]
             current_density_chem = (df_chem['WE(1).Current (A)'] * 1000) / ELECTRODE_AREA_CM2
             
             # Use the style dictionary to set color, marker, etc.
@@ -68,6 +108,7 @@ def plot_lsv_data():
                 df_chem['Potential applied (V)'],
                 current_density_chem,
                 label=ph_value,
+                rasterized=True,
                 **style
             )
 
@@ -80,7 +121,8 @@ def plot_lsv_data():
     axes[0].set_ylabel('j / mA$\\cdot$cm$^{-2}$', fontsize=12)
     plt.tight_layout()
     output_filename = 'lsv_comparison_plot.tiff'
-    plt.savefig(output_filename, dpi=600)
+    # Lossless LZW keeps the 600 dpi TIFF small and cheap to write.
+    plt.savefig(output_filename, dpi=600, pil_kwargs={'compression': 'tiff_lzw'})
     print(f"Plot saved successfully as '{output_filename}'")
 
 if __name__ == '__main__':